@@ -0,0 +1,55 @@
+/**
+ * Shared formatting helpers for the monitor messages.
+ */
+
+// toLocaleString constructs a fresh Intl.NumberFormat on every call; reuse
+// shared instances across the many formats per message instead.
+const DECIMAL_FORMAT = new Intl.NumberFormat("en-US", {
+  minimumFractionDigits: 2,
+  maximumFractionDigits: 2,
+});
+const INTEGER_FORMAT = new Intl.NumberFormat("en-US");
+
+export function formatNumber(value: number): string {
+  return DECIMAL_FORMAT.format(value);
+}
+
+export function formatPct(value: number): string {
+  return `${(value * 100).toFixed(2)}%`;
+}
+
+export function formatDelta(value: number): string {
+  const sign = value >= 0 ? "+" : "";
+  return `${sign}${INTEGER_FORMAT.format(Math.round(value))}`;
+}
+
+export function formatDeltaPct(value: number): string {
+  const sign = value >= 0 ? "+" : "";
+  return `${sign}${(value * 100).toFixed(2)}%`;
+}
+
+export function formatDepositDelta(
+  delta: [number, number] | null,
+  symbol: string
+): string {
+  if (delta === null) return "N/A";
+  const [absD, pctD] = delta;
+  return `${formatDeltaPct(pctD)} (${formatDelta(absD)} ${symbol})`;
+}
+
+// Messages show minute precision, so the timestamp string is re-derived only
+// when the minute changes; the concurrently running monitors otherwise each
+// allocate a Date and rebuild an identical string per message.
+let lastMinute = -1;
+let lastTimestamp = "";
+
+export function utcTimestamp(): string {
+  const minute = Math.floor(Date.now() / 60000);
+  if (minute !== lastMinute) {
+    lastMinute = minute;
+    lastTimestamp =
+      new Date(minute * 60000).toISOString().replace("T", " ").slice(0, 16) +
+      " UTC";
+  }
+  return lastTimestamp;
+}
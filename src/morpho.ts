@@ -0,0 +1,487 @@
+/**
+ * Shared core for the Morpho vault monitors: query building, fetching
+ * (APQ + retry), timeseries math, message formatting, and persisted send
+ * state. Each vault script supplies a VaultMonitorConfig and an entrypoint.
+ */
+
+import { createHash } from "node:crypto";
+import { readFileSync, writeFileSync, mkdirSync } from "node:fs";
+import { tmpdir } from "node:os";
+import { join } from "node:path";
+
+import {
+  formatDepositDelta,
+  formatNumber,
+  formatPct,
+  utcTimestamp,
+} from "./format";
+import { sendTelegramMessage } from "./telegram";
+
+// --- Constants ---
+
+const MORPHO_API_URL = "https://blue-api.morpho.org/graphql";
+
+export interface VaultMonitorConfig {
+  /** Prefix for console logs, e.g. "Morpho USDT". */
+  logLabel: string;
+  vaultAddress: string;
+  marketId: string;
+  tokenSymbol: string;
+  tokenDecimals: number;
+  /** Section header for the market block, e.g. "stUSDS/USDS Market". */
+  marketLabel: string;
+}
+
+// --- Types ---
+
+export interface TimeseriesPoint {
+  x: number;
+  y: string | null;
+}
+
+export interface VaultData {
+  name: string;
+  totalAssets: string;
+  totalAssetsUsd: number;
+  avgApy: number;
+  avgNetApy: number;
+  rewards: { supplyApr: number; asset: { symbol: string } }[];
+  historicalState: {
+    totalAssets_1h: TimeseriesPoint[];
+    totalAssets_12h: TimeseriesPoint[];
+    totalAssets_24h: TimeseriesPoint[];
+    avgNetApy_1h: TimeseriesPoint[];
+    avgNetApy_12h: TimeseriesPoint[];
+    avgNetApy_24h: TimeseriesPoint[];
+  };
+}
+
+export interface MarketData {
+  state: {
+    utilization: number;
+    totalLiquidityUsd: number;
+    liquidityAssets: string;
+    avgBorrowApy: number;
+  };
+  historicalState: {
+    borrowApy_1h: TimeseriesPoint[];
+    borrowApy_12h: TimeseriesPoint[];
+    borrowApy_24h: TimeseriesPoint[];
+  };
+}
+
+interface MorphoResponse {
+  data: { vault: VaultData; market: MarketData };
+  errors?: { message?: string }[];
+}
+
+// --- Timeseries math ---
+
+interface TimeseriesSummary {
+  sum: number;
+  count: number;
+  oldest: number | null;
+}
+
+// Single pass over a series: sum/count for averages and the last non-null
+// point (the oldest, as the API returns newest-first) for deltas. Points are
+// scaled with one float multiply against a reciprocal the caller computes
+// once per update — Number(y) is exact to ~15 significant digits, ample for
+// the 2-decimal display math, and it avoids a BigInt allocation and division
+// per point. APY series are already plain ratios and use the default scale.
+function summarizeTimeseries(
+  data: TimeseriesPoint[],
+  scale = 1
+): TimeseriesSummary {
+  let sum = 0;
+  let count = 0;
+  let oldest: number | null = null;
+  for (const point of data) {
+    const y = point.y;
+    if (y === null) continue;
+    const value = Number(y) * scale;
+    sum += value;
+    count++;
+    oldest = value;
+  }
+  return { sum, count, oldest };
+}
+
+function computeAverage(
+  data: TimeseriesPoint[],
+  scale = 1
+): number | null {
+  const { sum, count } = summarizeTimeseries(data, scale);
+  return count > 0 ? sum / count : null;
+}
+
+function computeDelta(
+  current: number,
+  data: TimeseriesPoint[],
+  scale = 1
+): [number, number] | null {
+  const { oldest } = summarizeTimeseries(data, scale);
+  if (oldest === null || oldest === 0) return null;
+  const absDelta = current - oldest;
+  return [absDelta, absDelta / oldest];
+}
+
+// --- State ---
+
+// Persisted between runs so an unchanged update is not re-sent. State lives
+// under STATE_DIR (point it at a mounted volume on Railway); with the default
+// tmpdir on an ephemeral filesystem this degrades to always sending.
+const STATE_DIR = process.env.STATE_DIR ?? tmpdir();
+
+interface MonitorState {
+  lastMessageHash?: string;
+  prevTotalAssets?: number;
+  unchangedCount?: number;
+  lastSentAt?: number;
+}
+
+// The cron cadence is fixed in railway.toml, so instead of lengthening a poll
+// interval we back off on sends: while deposits are unchanged the required gap
+// between sends grows 1.5x per quiet run (capped at a day), and snaps back to
+// every run the moment a delta is seen.
+const BASE_SEND_GAP_SECONDS = 6 * 3600;
+const MAX_SEND_GAP_SECONDS = 24 * 3600;
+
+function stateFilePath(key: string): string {
+  return join(STATE_DIR, `monitoring-bot-${key}.json`);
+}
+
+function readState(key: string): MonitorState {
+  try {
+    return JSON.parse(readFileSync(stateFilePath(key), "utf8")) as MonitorState;
+  } catch {
+    return {};
+  }
+}
+
+function writeState(key: string, state: MonitorState): void {
+  try {
+    mkdirSync(STATE_DIR, { recursive: true });
+    writeFileSync(stateFilePath(key), JSON.stringify(state));
+  } catch (err) {
+    console.warn(`[warn] Failed to write state for ${key}: ${err}`);
+  }
+}
+
+function hashMessage(text: string): string {
+  return createHash("sha256").update(text).digest("hex");
+}
+
+// --- Query ---
+
+function buildMorphoQuery(config: VaultMonitorConfig, end: number): string {
+  const ts1h = end - 7200;
+  const ts12h = end - 43200;
+  const ts24h = end - 86400;
+
+  return `
+    query GetAllData {
+      vault: vaultV2ByAddress(address: "${config.vaultAddress}", chainId: 1) {
+        address
+        name
+        totalAssets
+        totalAssetsUsd
+        avgApy
+        avgNetApy
+        rewards {
+          supplyApr
+          asset { symbol }
+        }
+        historicalState {
+          totalAssets_1h: totalAssets(options: { startTimestamp: ${ts1h}, endTimestamp: ${end}, interval: HOUR }) { x y }
+          totalAssets_12h: totalAssets(options: { startTimestamp: ${ts12h}, endTimestamp: ${end}, interval: HOUR }) { x y }
+          totalAssets_24h: totalAssets(options: { startTimestamp: ${ts24h}, endTimestamp: ${end}, interval: HOUR }) { x y }
+          avgNetApy_1h: avgNetApy(options: { startTimestamp: ${ts1h}, endTimestamp: ${end}, interval: HOUR }) { x y }
+          avgNetApy_12h: avgNetApy(options: { startTimestamp: ${ts12h}, endTimestamp: ${end}, interval: HOUR }) { x y }
+          avgNetApy_24h: avgNetApy(options: { startTimestamp: ${ts24h}, endTimestamp: ${end}, interval: HOUR }) { x y }
+        }
+      }
+      market: marketByUniqueKey(uniqueKey: "${config.marketId}", chainId: 1) {
+        state {
+          utilization
+          totalLiquidityUsd
+          liquidityAssets
+          avgBorrowApy
+        }
+        historicalState {
+          borrowApy_1h: borrowApy(options: { startTimestamp: ${ts1h}, endTimestamp: ${end}, interval: HOUR }) { x y }
+          borrowApy_12h: borrowApy(options: { startTimestamp: ${ts12h}, endTimestamp: ${end}, interval: HOUR }) { x y }
+          borrowApy_24h: borrowApy(options: { startTimestamp: ${ts24h}, endTimestamp: ${end}, interval: HOUR }) { x y }
+        }
+      }
+    }
+  `;
+}
+
+// The API aggregates on HOUR intervals, so queries are built against
+// hour-bucketed timestamps: the string stays stable within the hour (keeping
+// the APQ hash reusable across runs) with no loss of resolution. Both
+// serialized request bodies are memoized per vault until the bucket rolls
+// over, so retries and the APQ registration fallback reuse the same bytes.
+interface PreparedQuery {
+  bucket: number;
+  hashOnlyBody: string;
+  fullBody: string;
+}
+
+const preparedQueries = new Map<string, PreparedQuery>();
+
+function prepareQuery(config: VaultMonitorConfig): PreparedQuery {
+  const now = Math.floor(Date.now() / 1000);
+  const bucket = now - (now % 3600);
+
+  const cached = preparedQueries.get(config.vaultAddress);
+  if (cached && cached.bucket === bucket) return cached;
+
+  const query = buildMorphoQuery(config, bucket);
+  const extensions = {
+    persistedQuery: {
+      version: 1,
+      sha256Hash: createHash("sha256").update(query).digest("hex"),
+    },
+  };
+  const prepared: PreparedQuery = {
+    bucket,
+    hashOnlyBody: JSON.stringify({ extensions }),
+    fullBody: JSON.stringify({ query, extensions }),
+  };
+  preparedQueries.set(config.vaultAddress, prepared);
+  return prepared;
+}
+
+// --- Fetch ---
+
+class MorphoApiError extends Error {
+  constructor(readonly status: number) {
+    super(`Morpho API error: ${status}`);
+  }
+}
+
+async function postMorpho(body: string): Promise<MorphoResponse> {
+  let res: Response | undefined;
+  let lastError: unknown;
+
+  for (let attempt = 0; attempt < 3; attempt++) {
+    if (attempt > 0) {
+      // Jittered exponential backoff (~100ms, ~300ms) keeps retries tight
+      // enough that the keep-alive connection survives to be reused. On
+      // 429/503 a Retry-After header takes precedence.
+      let waitMs = 100 * 3 ** (attempt - 1) + Math.random() * 50;
+      if (res && (res.status === 429 || res.status === 503)) {
+        const retryAfter = Number(res.headers.get("Retry-After"));
+        if (Number.isFinite(retryAfter) && retryAfter > 0) {
+          waitMs = Math.max(waitMs, retryAfter * 1000);
+        }
+      }
+      // Drain the failed response so its socket returns to the pool.
+      await res?.arrayBuffer().catch(() => {});
+      await new Promise((r) => setTimeout(r, waitMs));
+    }
+
+    try {
+      res = await fetch(MORPHO_API_URL, {
+        method: "POST",
+        // Node's fetch negotiates gzip by default; pin it so the multi-KB
+        // timeseries response stays compressed regardless of runtime defaults.
+        headers: { "Content-Type": "application/json", "Accept-Encoding": "gzip" },
+        body,
+      });
+    } catch (err) {
+      // Transport errors (connection reset, DNS blip) are retryable too;
+      // previously they rejected without any retry.
+      lastError = err;
+      res = undefined;
+      continue;
+    }
+
+    if (res.ok || (res.status < 500 && res.status !== 429)) break;
+  }
+
+  if (!res) {
+    throw new Error(`Morpho API request failed: ${lastError}`);
+  }
+  if (!res.ok) {
+    throw new MorphoApiError(res.status);
+  }
+
+  return (await res.json()) as MorphoResponse;
+}
+
+const APQ_MISS = /PersistedQueryNot(Found|Supported)/;
+
+async function fetchMorphoData(
+  config: VaultMonitorConfig
+): Promise<MorphoResponse> {
+  const prepared = prepareQuery(config);
+
+  // Automatic Persisted Queries: try the ~120-byte hash-only form first; if
+  // the server doesn't know the query yet (or APQ at all), re-send with the
+  // full text, which also registers the hash for subsequent runs. A server
+  // without APQ support may reject the query-less body with a 4xx instead of
+  // a GraphQL error, so that falls back too; other errors are returned as-is
+  // rather than wasting a duplicate POST.
+  let json: MorphoResponse;
+  try {
+    json = await postMorpho(prepared.hashOnlyBody);
+  } catch (err) {
+    if (err instanceof MorphoApiError && err.status < 500) {
+      return postMorpho(prepared.fullBody);
+    }
+    throw err;
+  }
+  if (json.errors?.some((e) => e.message && APQ_MISS.test(e.message))) {
+    json = await postMorpho(prepared.fullBody);
+  }
+  return json;
+}
+
+// Reciprocal raw-unit scales, computed once per decimals value instead of on
+// every update.
+const TOKEN_SCALES = new Map<number, number>();
+
+function tokenScaleFor(decimals: number): number {
+  let scale = TOKEN_SCALES.get(decimals);
+  if (scale === undefined) {
+    scale = 10 ** -decimals;
+    TOKEN_SCALES.set(decimals, scale);
+  }
+  return scale;
+}
+
+// --- Update ---
+
+export async function sendVaultUpdate(
+  config: VaultMonitorConfig,
+  botToken: string,
+  chatId: string,
+  topicId?: number
+): Promise<void> {
+  const json = await fetchMorphoData(config);
+
+  if (json.errors) {
+    throw new Error(`GraphQL errors: ${JSON.stringify(json.errors)}`);
+  }
+
+  const { vault, market } = json.data;
+  const { tokenSymbol } = config;
+  const tokenScale = tokenScaleFor(config.tokenDecimals);
+
+  const totalAssetsUsd = Number(vault.totalAssetsUsd);
+  const totalAssetsRaw = Number(vault.totalAssets) * tokenScale;
+  const nativeApy = Number(vault.avgApy);
+  const netApy = Number(vault.avgNetApy);
+  const rewardsApy = vault.rewards.reduce(
+    (sum, r) => sum + Number(r.supplyApr),
+    0
+  );
+
+  const { state: marketState } = market;
+  const utilization = Number(marketState.utilization);
+  const liquidityAssets = Number(marketState.liquidityAssets) * tokenScale;
+  const borrowApy = Number(marketState.avgBorrowApy);
+
+  const vaultHist = vault.historicalState;
+  const delta1h = computeDelta(totalAssetsRaw, vaultHist.totalAssets_1h, tokenScale);
+  const delta12h = computeDelta(totalAssetsRaw, vaultHist.totalAssets_12h, tokenScale);
+  const delta24h = computeDelta(totalAssetsRaw, vaultHist.totalAssets_24h, tokenScale);
+
+  const avgApy1h = computeAverage(vaultHist.avgNetApy_1h);
+  const avgApy12h = computeAverage(vaultHist.avgNetApy_12h);
+  const avgApy24h = computeAverage(vaultHist.avgNetApy_24h);
+
+  const marketHist = market.historicalState;
+  const avgBorrow1h = computeAverage(marketHist.borrowApy_1h);
+  const avgBorrow12h = computeAverage(marketHist.borrowApy_12h);
+  const avgBorrow24h = computeAverage(marketHist.borrowApy_24h);
+
+  const body = `*Morpho Vault Monitor*
+
+*${vault.name}*
+
+*Total Deposits:* ${formatNumber(totalAssetsRaw)} ${tokenSymbol}
+
+*Deposit Changes:*
+  1h:  ${formatDepositDelta(delta1h, tokenSymbol)}
+  12h: ${formatDepositDelta(delta12h, tokenSymbol)}
+  24h: ${formatDepositDelta(delta24h, tokenSymbol)}
+
+*APY Breakdown:*
+  Native APY: ${formatPct(nativeApy)}
+  Rewards APY: ${formatPct(rewardsApy)}
+  *Total APY: ${formatPct(netApy)}*
+
+*Avg Total APY:*
+  1h:  ${avgApy1h !== null ? formatPct(avgApy1h) : "N/A"}
+  12h: ${avgApy12h !== null ? formatPct(avgApy12h) : "N/A"}
+  24h: ${avgApy24h !== null ? formatPct(avgApy24h) : "N/A"}
+
+*${config.marketLabel}:*
+  Utilization: ${formatPct(utilization)}
+  Liquidity: ${formatNumber(liquidityAssets)} ${tokenSymbol}
+  Borrow Rate: ${formatPct(borrowApy)}
+
+*Avg Borrow Rate:*
+  1h:  ${avgBorrow1h !== null ? formatPct(avgBorrow1h) : "N/A"}
+  12h: ${avgBorrow12h !== null ? formatPct(avgBorrow12h) : "N/A"}
+  24h: ${avgBorrow24h !== null ? formatPct(avgBorrow24h) : "N/A"}`;
+
+  // Hash the body (which excludes the timestamp) so an unchanged update is
+  // not re-sent on every cron fire.
+  const stateKey = `morpho-${config.vaultAddress}`;
+  const state = readState(stateKey);
+  const bodyHash = hashMessage(body);
+  const now = Math.floor(Date.now() / 1000);
+
+  const unchanged = totalAssetsRaw === state.prevTotalAssets;
+  const unchangedCount = unchanged ? (state.unchangedCount ?? 0) + 1 : 0;
+  const sendGap = Math.min(
+    BASE_SEND_GAP_SECONDS * 1.5 ** unchangedCount,
+    MAX_SEND_GAP_SECONDS
+  );
+  const backedOff =
+    unchanged &&
+    state.lastSentAt !== undefined &&
+    now - state.lastSentAt < sendGap;
+  // The hash dedupe honors the same 24h cap as the deposit backoff: a
+  // byte-stable message must still go out once a day so a quiet vault stays
+  // distinguishable from a dead monitor.
+  const overdue =
+    state.lastSentAt !== undefined &&
+    now - state.lastSentAt >= MAX_SEND_GAP_SECONDS;
+
+  // Both write paths emit the same four keys in the same order so the state
+  // objects (and the JSON on disk) keep a single stable shape.
+  if (!overdue && (bodyHash === state.lastMessageHash || backedOff)) {
+    writeState(stateKey, {
+      lastMessageHash: state.lastMessageHash,
+      prevTotalAssets: totalAssetsRaw,
+      unchangedCount,
+      lastSentAt: state.lastSentAt,
+    });
+    console.log(
+      `[${config.logLabel}] Skipping send (${unchangedCount} unchanged run${unchangedCount === 1 ? "" : "s"})`
+    );
+    return;
+  }
+
+  await sendTelegramMessage(
+    botToken,
+    chatId,
+    `${body}\n\n_${utcTimestamp()}_`,
+    topicId
+  );
+  writeState(stateKey, {
+    lastMessageHash: bodyHash,
+    prevTotalAssets: totalAssetsRaw,
+    unchangedCount,
+    lastSentAt: now,
+  });
+  console.log(
+    `[${config.logLabel}] Update sent: $${formatNumber(totalAssetsUsd)}`
+  );
+}
@@ -0,0 +1,61 @@
+/**
+ * Entry point that runs every monitor in a single process.
+ *
+ * Node's fetch keeps a per-origin keep-alive pool, so running the monitors
+ * together reuses the TLS session to api.telegram.org (and the shared data
+ * APIs) instead of paying a fresh handshake and runtime startup per script.
+ */
+
+import { main as sendUsdsUpdate } from "./send_update";
+import { main as sendUsdsPegUpdate } from "./send_usds_peg_update";
+import { main as sendUsdtUpdate } from "./send_usdt_update";
+import { main as sendUsdcUpdate } from "./send_usdc_update";
+import { main as sendUsdsFlagshipUpdate } from "./send_usds_flagship_update";
+import { main as sendUsdtSavingsUpdate } from "./send_usdt_savings_update";
+
+const MONITORS: [string, () => Promise<void>][] = [
+  ["send_update", sendUsdsUpdate],
+  ["send_usds_peg_update", sendUsdsPegUpdate],
+  ["send_usdt_update", sendUsdtUpdate],
+  ["send_usdc_update", sendUsdcUpdate],
+  ["send_usds_flagship_update", sendUsdsFlagshipUpdate],
+  ["send_usdt_savings_update", sendUsdtSavingsUpdate],
+];
+
+async function main() {
+  // Warm the TLS connection to api.telegram.org while the monitors are busy
+  // fetching data, so the first sendMessage reuses an established keep-alive
+  // connection instead of paying the handshake. Fire-and-forget: a failure
+  // here just means the first send pays the handshake after all. The body
+  // must be drained or undici won't return the connection to the pool.
+  const botToken = process.env.TELEGRAM_BOT_TOKEN;
+  if (botToken) {
+    fetch(`https://api.telegram.org/bot${botToken}/getMe`)
+      .then((res) => res.arrayBuffer())
+      .catch(() => {});
+  }
+
+  // Run the monitors concurrently: each one is dominated by network
+  // round-trips, so overlapping them cuts wall-clock time to roughly the
+  // slowest monitor instead of the sum of all six.
+  const results = await Promise.allSettled(MONITORS.map(([, run]) => run()));
+
+  let failed = 0;
+  results.forEach((result, i) => {
+    if (result.status === "rejected") {
+      console.error(`[${MONITORS[i][0]}]`, result.reason);
+      failed++;
+    }
+  });
+
+  if (failed === MONITORS.length) {
+    throw new Error("All monitors failed");
+  }
+}
+
+main()
+  .then(() => process.exit(0))
+  .catch((err) => {
+    console.error(err);
+    process.exit(1);
+  });
@@ -3,196 +3,21 @@
  * and send Telegram update. Designed for use with Railway cron jobs.
  */
 
-// --- Constants ---
+import { fileURLToPath } from "node:url";
 
-const VAULT_ADDRESS = "0x56bfa6f53669B836D1E0Dfa5e99706b12c373ecf";
-const MARKET_ID =
-  "0xd570c19c0dc0fbe4ab7faf4a37c4150e1c141c8aada8ca3e1b4b6c1b712af93d";
-const MORPHO_API_URL = "https://blue-api.morpho.org/graphql";
-const TOKEN_SYMBOL = "USDC";
-const TOKEN_DECIMALS = 6;
+import { sendVaultUpdate, VaultMonitorConfig } from "./morpho";
 
-// --- Types ---
+const CONFIG: VaultMonitorConfig = Object.freeze({
+  logLabel: "Morpho USDC",
+  vaultAddress: "0x56bfa6f53669B836D1E0Dfa5e99706b12c373ecf",
+  marketId:
+    "0xd570c19c0dc0fbe4ab7faf4a37c4150e1c141c8aada8ca3e1b4b6c1b712af93d",
+  tokenSymbol: "USDC",
+  tokenDecimals: 6,
+  marketLabel: "Morpho Market",
+});
 
-interface TimeseriesPoint {
-  x: number;
-  y: string | null;
-}
-
-interface VaultData {
-  name: string;
-  totalAssets: string;
-  totalAssetsUsd: number;
-  avgApy: number;
-  avgNetApy: number;
-  rewards: { supplyApr: number; asset: { symbol: string } }[];
-  historicalState: {
-    totalAssets_1h: TimeseriesPoint[];
-    totalAssets_12h: TimeseriesPoint[];
-    totalAssets_24h: TimeseriesPoint[];
-    avgNetApy_1h: TimeseriesPoint[];
-    avgNetApy_12h: TimeseriesPoint[];
-    avgNetApy_24h: TimeseriesPoint[];
-  };
-}
-
-interface MarketData {
-  state: {
-    utilization: number;
-    totalLiquidityUsd: number;
-    liquidityAssets: string;
-    avgBorrowApy: number;
-  };
-  historicalState: {
-    borrowApy_1h: TimeseriesPoint[];
-    borrowApy_12h: TimeseriesPoint[];
-    borrowApy_24h: TimeseriesPoint[];
-  };
-}
-
-// --- Helpers ---
-
-function formatNumber(value: number): string {
-  return value.toLocaleString("en-US", {
-    minimumFractionDigits: 2,
-    maximumFractionDigits: 2,
-  });
-}
-
-function formatPct(value: number): string {
-  return `${(value * 100).toFixed(2)}%`;
-}
-
-function formatDelta(value: number): string {
-  const sign = value >= 0 ? "+" : "";
-  return `${sign}${Math.round(value).toLocaleString("en-US")}`;
-}
-
-function formatDeltaPct(value: number): string {
-  const sign = value >= 0 ? "+" : "";
-  return `${sign}${(value * 100).toFixed(2)}%`;
-}
-
-function formatDepositDelta(delta: [number, number] | null): string {
-  if (delta === null) return "N/A";
-  const [absD, pctD] = delta;
-  return `${formatDeltaPct(pctD)} (${formatDelta(absD)} ${TOKEN_SYMBOL})`;
-}
-
-function getTimeseriesValues(
-  data: TimeseriesPoint[],
-  decimals = 0
-): number[] {
-  return data
-    .filter((p) => p.y !== null)
-    .map((p) =>
-      decimals > 0
-        ? Number((BigInt(p.y!) * 10000n) / BigInt(10 ** decimals)) / 10000
-        : Number(p.y)
-    );
-}
-
-function computeAverage(
-  data: TimeseriesPoint[],
-  decimals = 0
-): number | null {
-  const values = getTimeseriesValues(data, decimals);
-  if (values.length === 0) return null;
-  return values.reduce((a, b) => a + b, 0) / values.length;
-}
-
-function computeDelta(
-  current: number,
-  data: TimeseriesPoint[],
-  decimals = 0
-): [number, number] | null {
-  const values = getTimeseriesValues(data, decimals);
-  if (values.length === 0) return null;
-  const oldest = values[values.length - 1];
-  if (oldest === 0) return null;
-  const absDelta = current - oldest;
-  const pctDelta = absDelta / oldest;
-  return [absDelta, pctDelta];
-}
-
-async function sendTelegramMessage(
-  botToken: string,
-  chatId: string,
-  text: string,
-  topicId?: number
-): Promise<void> {
-  const payload: Record<string, unknown> = {
-    chat_id: chatId,
-    text,
-    parse_mode: "Markdown",
-  };
-  if (topicId !== undefined) {
-    payload.message_thread_id = topicId;
-  }
-
-  const res = await fetch(
-    `https://api.telegram.org/bot${botToken}/sendMessage`,
-    {
-      method: "POST",
-      headers: { "Content-Type": "application/json" },
-      body: JSON.stringify(payload),
-    }
-  );
-
-  if (!res.ok) {
-    const body = await res.text();
-    throw new Error(`Telegram API error ${res.status}: ${body}`);
-  }
-}
-
-// --- Morpho update ---
-
-function buildMorphoQuery(): string {
-  const now = Math.floor(Date.now() / 1000);
-  const ts1h = now - 7200;
-  const ts12h = now - 43200;
-  const ts24h = now - 86400;
-
-  return `
-    query GetAllData {
-      vault: vaultV2ByAddress(address: "${VAULT_ADDRESS}", chainId: 1) {
-        address
-        name
-        totalAssets
-        totalAssetsUsd
-        avgApy
-        avgNetApy
-        rewards {
-          supplyApr
-          asset { symbol }
-        }
-        historicalState {
-          totalAssets_1h: totalAssets(options: { startTimestamp: ${ts1h}, endTimestamp: ${now}, interval: HOUR }) { x y }
-          totalAssets_12h: totalAssets(options: { startTimestamp: ${ts12h}, endTimestamp: ${now}, interval: HOUR }) { x y }
-          totalAssets_24h: totalAssets(options: { startTimestamp: ${ts24h}, endTimestamp: ${now}, interval: HOUR }) { x y }
-          avgNetApy_1h: avgNetApy(options: { startTimestamp: ${ts1h}, endTimestamp: ${now}, interval: HOUR }) { x y }
-          avgNetApy_12h: avgNetApy(options: { startTimestamp: ${ts12h}, endTimestamp: ${now}, interval: HOUR }) { x y }
-          avgNetApy_24h: avgNetApy(options: { startTimestamp: ${ts24h}, endTimestamp: ${now}, interval: HOUR }) { x y }
-        }
-      }
-      market: marketByUniqueKey(uniqueKey: "${MARKET_ID}", chainId: 1) {
-        state {
-          utilization
-          totalLiquidityUsd
-          liquidityAssets
-          avgBorrowApy
-        }
-        historicalState {
-          borrowApy_1h: borrowApy(options: { startTimestamp: ${ts1h}, endTimestamp: ${now}, interval: HOUR }) { x y }
-          borrowApy_12h: borrowApy(options: { startTimestamp: ${ts12h}, endTimestamp: ${now}, interval: HOUR }) { x y }
-          borrowApy_24h: borrowApy(options: { startTimestamp: ${ts24h}, endTimestamp: ${now}, interval: HOUR }) { x y }
-        }
-      }
-    }
-  `;
-}
-
-async function main() {
+export async function main() {
   const botToken = process.env.TELEGRAM_BOT_TOKEN;
   const chatId = process.env.TELEGRAM_CHAT_ID;
   const topicId = process.env.TELEGRAM_TOPIC_ID_MORPHO_USDC_RISK_CAPITAL
@@ -203,105 +28,14 @@ async function main() {
     throw new Error("TELEGRAM_BOT_TOKEN and TELEGRAM_CHAT_ID must be set");
   }
 
-  let res: Response | undefined;
-  for (let attempt = 0; attempt < 3; attempt++) {
-    res = await fetch(MORPHO_API_URL, {
-      method: "POST",
-      headers: { "Content-Type": "application/json" },
-      body: JSON.stringify({ query: buildMorphoQuery() }),
-    });
-    if (res.ok || res.status < 500) break;
-    if (attempt < 2) await new Promise((r) => setTimeout(r, 2000 * (attempt + 1)));
-  }
-
-  if (!res!.ok) {
-    throw new Error(`Morpho API error: ${res!.status}`);
-  }
-
-  const json = (await res!.json()) as {
-    data: { vault: VaultData; market: MarketData };
-    errors?: unknown[];
-  };
-
-  if (json.errors) {
-    throw new Error(`GraphQL errors: ${JSON.stringify(json.errors)}`);
-  }
-
-  const { vault, market } = json.data;
-
-  const totalAssetsUsd = Number(vault.totalAssetsUsd);
-  const totalAssetsRaw =
-    Number((BigInt(vault.totalAssets) * 10000n) / BigInt(10 ** TOKEN_DECIMALS)) / 10000;
-  const nativeApy = Number(vault.avgApy);
-  const netApy = Number(vault.avgNetApy);
-  const rewardsApy = vault.rewards.reduce(
-    (sum, r) => sum + Number(r.supplyApr),
-    0
-  );
-
-  const { state } = market;
-  const utilization = Number(state.utilization);
-  const liquidityAssets =
-    Number((BigInt(state.liquidityAssets) * 10000n) / BigInt(10 ** TOKEN_DECIMALS)) / 10000;
-  const borrowApy = Number(state.avgBorrowApy);
-
-  const vaultHist = vault.historicalState;
-  const delta1h = computeDelta(totalAssetsRaw, vaultHist.totalAssets_1h, TOKEN_DECIMALS);
-  const delta12h = computeDelta(totalAssetsRaw, vaultHist.totalAssets_12h, TOKEN_DECIMALS);
-  const delta24h = computeDelta(totalAssetsRaw, vaultHist.totalAssets_24h, TOKEN_DECIMALS);
-
-  const avgApy1h = computeAverage(vaultHist.avgNetApy_1h);
-  const avgApy12h = computeAverage(vaultHist.avgNetApy_12h);
-  const avgApy24h = computeAverage(vaultHist.avgNetApy_24h);
-
-  const marketHist = market.historicalState;
-  const avgBorrow1h = computeAverage(marketHist.borrowApy_1h);
-  const avgBorrow12h = computeAverage(marketHist.borrowApy_12h);
-  const avgBorrow24h = computeAverage(marketHist.borrowApy_24h);
-
-  const timestamp =
-    new Date().toISOString().replace("T", " ").slice(0, 16) + " UTC";
-
-  const message = `*Morpho Vault Monitor*
-
-*${vault.name}*
-
-*Total Deposits:* ${formatNumber(totalAssetsRaw)} ${TOKEN_SYMBOL}
-
-*Deposit Changes:*
-  1h:  ${formatDepositDelta(delta1h)}
-  12h: ${formatDepositDelta(delta12h)}
-  24h: ${formatDepositDelta(delta24h)}
-
-*APY Breakdown:*
-  Native APY: ${formatPct(nativeApy)}
-  Rewards APY: ${formatPct(rewardsApy)}
-  *Total APY: ${formatPct(netApy)}*
-
-*Avg Total APY:*
-  1h:  ${avgApy1h !== null ? formatPct(avgApy1h) : "N/A"}
-  12h: ${avgApy12h !== null ? formatPct(avgApy12h) : "N/A"}
-  24h: ${avgApy24h !== null ? formatPct(avgApy24h) : "N/A"}
-
-*Morpho Market:*
-  Utilization: ${formatPct(utilization)}
-  Liquidity: ${formatNumber(liquidityAssets)} ${TOKEN_SYMBOL}
-  Borrow Rate: ${formatPct(borrowApy)}
-
-*Avg Borrow Rate:*
-  1h:  ${avgBorrow1h !== null ? formatPct(avgBorrow1h) : "N/A"}
-  12h: ${avgBorrow12h !== null ? formatPct(avgBorrow12h) : "N/A"}
-  24h: ${avgBorrow24h !== null ? formatPct(avgBorrow24h) : "N/A"}
-
-_${timestamp}_`;
-
-  await sendTelegramMessage(botToken, chatId, message, topicId);
-  console.log(`[Morpho USDC] Update sent: $${formatNumber(totalAssetsUsd)}`);
+  await sendVaultUpdate(CONFIG, botToken, chatId, topicId);
 }
 
-main()
-  .then(() => process.exit(0))
-  .catch((err) => {
-    console.error(err);
-    process.exit(1);
-  });
+if (process.argv[1] === fileURLToPath(import.meta.url)) {
+  main()
+    .then(() => process.exit(0))
+    .catch((err) => {
+      console.error(err);
+      process.exit(1);
+    });
+}
@@ -2,6 +2,11 @@
  * Single-shot script to fetch USDS prices from 4 DEX pools and send a Telegram peg monitor update.
  */
 
+import { fileURLToPath } from "node:url";
+
+import { formatNumber, utcTimestamp } from "./format";
+import { sendTelegramMessage } from "./telegram";
+
 // --- Constants ---
 
 const USDS_ADDRESS = "0xdc035d45d973e3ec169d2276ddab16f1e407384f";
@@ -81,13 +86,6 @@ interface PoolPegData {
 
 // --- Helpers ---
 
-function formatNumber(value: number): string {
-  return value.toLocaleString("en-US", {
-    minimumFractionDigits: 2,
-    maximumFractionDigits: 2,
-  });
-}
-
 function formatPrice(value: number): string {
   return `$${value.toFixed(4)}`;
 }
@@ -97,38 +95,6 @@ function formatBps(bps: number): string {
   return `${sign}${bps.toFixed(1)} bps`;
 }
 
-// --- Telegram ---
-
-async function sendTelegramMessage(
-  botToken: string,
-  chatId: string,
-  text: string,
-  topicId?: number
-): Promise<void> {
-  const payload: Record<string, unknown> = {
-    chat_id: chatId,
-    text,
-    parse_mode: "Markdown",
-  };
-  if (topicId !== undefined) {
-    payload.message_thread_id = topicId;
-  }
-
-  const res = await fetch(
-    `https://api.telegram.org/bot${botToken}/sendMessage`,
-    {
-      method: "POST",
-      headers: { "Content-Type": "application/json" },
-      body: JSON.stringify(payload),
-    }
-  );
-
-  if (!res.ok) {
-    const body = await res.text();
-    throw new Error(`Telegram API error ${res.status}: ${body}`);
-  }
-}
-
 // --- Fetch functions ---
 
 async function fetchGeckoPoolData(): Promise<Map<string, GeckoPool>> {
@@ -221,9 +187,6 @@ function buildPoolPegData(
 // --- Formatting ---
 
 function formatMessage(pools: PoolPegData[]): string {
-  const timestamp =
-    new Date().toISOString().replace("T", " ").slice(0, 16) + " UTC";
-
   let msg = "*USDS Peg Monitor*\n";
 
   for (const pool of pools) {
@@ -256,14 +219,14 @@ function formatMessage(pools: PoolPegData[]): string {
   msg += `  VWAP: ${formatPrice(vwap)} (${formatBps(vwapBps)})\n`;
   msg += `  Total TVL: $${formatNumber(totalTvl)}\n`;
 
-  msg += `\n_${timestamp}_`;
+  msg += `\n_${utcTimestamp()}_`;
 
   return msg;
 }
 
 // --- Main ---
 
-async function main() {
+export async function main() {
   const botToken = process.env.TELEGRAM_BOT_TOKEN;
   const chatId = process.env.TELEGRAM_CHAT_ID;
   const topicId = process.env.TELEGRAM_TOPIC_ID_USDS_PEG
@@ -309,9 +272,11 @@ async function main() {
 
 // --- Entry ---
 
-main()
-  .then(() => process.exit(0))
-  .catch((err) => {
-    console.error(err);
-    process.exit(1);
-  });
+if (process.argv[1] === fileURLToPath(import.meta.url)) {
+  main()
+    .then(() => process.exit(0))
+    .catch((err) => {
+      console.error(err);
+      process.exit(1);
+    });
+}
@@ -0,0 +1,63 @@
+/**
+ * Shared Telegram send path for all monitors.
+ *
+ * Every monitor posts to the same group (different topics), and Telegram
+ * enforces roughly one message per second per chat and 20 per minute per
+ * group. Sends are serialized through a queue with a minimum gap so the
+ * concurrently running monitors cannot burst past the limit.
+ */
+
+const MIN_SEND_GAP_MS = 1100;
+
+let sendQueue: Promise<void> = Promise.resolve();
+let lastSentAt = 0;
+
+function delay(ms: number): Promise<void> {
+  return new Promise((r) => setTimeout(r, ms));
+}
+
+export function sendTelegramMessage(
+  botToken: string,
+  chatId: string,
+  text: string,
+  topicId?: number
+): Promise<void> {
+  const send = async () => {
+    const wait = lastSentAt + MIN_SEND_GAP_MS - Date.now();
+    if (wait > 0) await delay(wait);
+
+    const payload: Record<string, unknown> = {
+      chat_id: chatId,
+      text,
+      parse_mode: "Markdown",
+    };
+    if (topicId !== undefined) {
+      payload.message_thread_id = topicId;
+    }
+
+    const res = await fetch(
+      `https://api.telegram.org/bot${botToken}/sendMessage`,
+      {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify(payload),
+      }
+    );
+
+    lastSentAt = Date.now();
+
+    if (!res.ok) {
+      const body = await res.text();
+      throw new Error(`Telegram API error ${res.status}: ${body}`);
+    }
+  };
+
+  const queued = sendQueue.then(send);
+  // Keep the queue alive when a send fails; the caller still sees the
+  // rejection through the returned promise.
+  sendQueue = queued.then(
+    () => {},
+    () => {}
+  );
+  return queued;
+}